@@ -20,30 +20,29 @@ def main(args):
     if not isinstance(infiles, list):
         infiles = [args.infiles]
 
+    if args.serve:
+        from inflammation import server  # pylint: disable=import-outside-toplevel
+        server.serve(infiles, host=args.host, port=args.port, compact=args.compact)
+        return
+
+    view = views.load_view(args.view)
+
     for filename in infiles:
-        inflammation_data = models.load_csv(filename)
+        inflammation_data = models.load_csv(filename, compact=args.compact)
 
-        if args.view == 'visualize':
+        if views.VIEWS[args.view].data == 'statistics':
             view_data = {
                 'average': models.daily_mean(inflammation_data),
                 'max': models.daily_max(inflammation_data),
                 'min': models.daily_min(inflammation_data),
             }
 
-            views.visualize(view_data)
-
-        elif args.view == 'record':
-            patient_data = inflammation_data[args.patient]
-            observations = [models.Observation(day, value) for day, value in enumerate(patient_data)]
-            patient = models.Patient('UNKNOWN', observations)
+            view(view_data)
 
-            views.display_patient_record(patient)
+        else:
+            patient = models.patient_from_row('UNKNOWN', inflammation_data[args.patient])
 
-        elif args.view == 'json':
-            patient_data = inflammation_data[args.patient]
-            observations = [models.Observation(day, value) for day, value in enumerate(patient_data)]
-            patient = models.Patient('UNKNOWN', observations)
-            views.display_patient_as_json(patient)
+            view(patient)
 
 
 if __name__ == "__main__":
@@ -58,7 +57,7 @@ if __name__ == "__main__":
     parser.add_argument(
         '--view',
         default='visualize',
-        choices=['visualize', 'record', 'json'],
+        choices=list(views.VIEWS),
         help='Which view should be used?')
 
     parser.add_argument(
@@ -67,6 +66,27 @@ if __name__ == "__main__":
         default=0,
         help='Which patient should be displayed?')
 
+    parser.add_argument(
+        '--compact',
+        action='store_true',
+        help='Store the loaded data in a compact dtype (uint8/uint16/float32)')
+
+    parser.add_argument(
+        '--serve',
+        action='store_true',
+        help='Keep the data loaded and answer queries over HTTP')
+
+    parser.add_argument(
+        '--host',
+        default='127.0.0.1',
+        help='Which address should the server listen on?')
+
+    parser.add_argument(
+        '--port',
+        type=int,
+        default=8000,
+        help='Which port should the server listen on?')
+
     args = parser.parse_args()
 
     main(args)
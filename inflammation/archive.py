@@ -0,0 +1,254 @@
+"""
+Module for storing inflammation data in compressed archives.
+
+An archive holds a 2D inflammation data array as fixed-size chunks of rows,
+each compressed independently with zlib or lzma. A chunk index records where
+each chunk is, so any range of patients can be read by decompressing only
+the chunks that hold them, and those chunks are decompressed in parallel.
+
+Layout of an archive file (all integers little-endian):
+
+- header: magic, format version, codec, dtype, number of rows and columns,
+  rows per chunk, number of chunks and the offset of the chunk index
+- the compressed chunks, in row order
+- the chunk index: the offset and length of each compressed chunk
+
+Archives can be created from CSV files with::
+
+    python -m inflammation.archive [--codec zlib|lzma] [--compact] <data/datafile>...
+"""
+
+import argparse
+import lzma
+import os
+import struct
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from inflammation import models
+from inflammation.models import ARCHIVE_SUFFIX
+
+_MAGIC = b'INFLZ\x00'
+_VERSION = 1
+_HEADER = struct.Struct('<6sBB8sQQQQQ')
+_INDEX_ENTRY = struct.Struct('<QQ')
+
+CODECS = {
+    'zlib': (0, zlib.compress, zlib.decompress),
+    'lzma': (1, lzma.compress, lzma.decompress),
+}
+_CODEC_NAMES = {codec_id: name for name, (codec_id, _, _) in CODECS.items()}
+
+
+def write_archive(filename: str, data: np.ndarray, chunk_rows: int = 4096,
+                  codec: str = 'zlib') -> None:
+    """
+    Write a 2D inflammation data array to an archive.
+
+    :param filename: Filename of the archive to write
+    :param data: 2D array of inflammation data
+    :param chunk_rows: Number of rows in each chunk
+    :param codec: Compression codec, 'zlib' or 'lzma'
+    :returns: None
+    """
+    if not isinstance(data, np.ndarray):
+        raise TypeError('Data should be of type ndarray')
+
+    if len(data.shape) != 2:
+        raise ValueError('Data should be 2D')
+
+    if chunk_rows < 1:
+        raise ValueError('Chunk rows should be positive')
+
+    codec_id, compress, _ = CODECS[codec]
+    data = np.ascontiguousarray(data, dtype=data.dtype.newbyteorder('<'))
+    dtype = data.dtype.str.encode('ascii')
+    n_chunks = -(-len(data) // chunk_rows)
+
+    with open(filename, 'wb') as archive:
+        archive.write(_HEADER.pack(_MAGIC, _VERSION, codec_id, dtype, 0, 0, 0, 0, 0))
+
+        index = []
+        for start in range(0, len(data), chunk_rows):
+            chunk = compress(data[start:start + chunk_rows].tobytes())
+            index.append((archive.tell(), len(chunk)))
+            archive.write(chunk)
+
+        index_offset = archive.tell()
+        for entry in index:
+            archive.write(_INDEX_ENTRY.pack(*entry))
+
+        archive.seek(0)
+        archive.write(_HEADER.pack(_MAGIC, _VERSION, codec_id, dtype, data.shape[0],
+                                   data.shape[1], chunk_rows, n_chunks, index_offset))
+
+
+class Archive:
+    """A compressed archive of inflammation data."""
+    def __init__(self, filename: str):
+        """
+        Open an archive, reading its header and chunk index.
+
+        :param filename: Filename of the archive
+        """
+        self.filename = filename
+        with open(filename, 'rb') as archive:
+            header = archive.read(_HEADER.size)
+            if len(header) != _HEADER.size or header[:len(_MAGIC)] != _MAGIC:
+                raise ValueError("File:" + str(filename) + " is not an inflammation archive")
+
+            _, version, codec_id, dtype, n_rows, n_cols, self.chunk_rows, n_chunks, \
+                index_offset = _HEADER.unpack(header)
+            if version != _VERSION:
+                raise ValueError("Archive version:" + str(version) + " is not supported")
+
+            archive.seek(index_offset)
+            index = archive.read(n_chunks * _INDEX_ENTRY.size)
+
+        self.codec = _CODEC_NAMES[codec_id]
+        self.dtype = np.dtype(dtype.rstrip(b'\x00').decode('ascii'))
+        self.shape = (n_rows, n_cols)
+        self.index = list(_INDEX_ENTRY.iter_unpack(index))
+
+    def __len__(self):
+        return self.shape[0]
+
+    def _decompress_chunk(self, chunk: int, compressed: bytes) -> np.ndarray:
+        """
+        Decompress a chunk into an array.
+
+        :param chunk: Number of the chunk
+        :param compressed: Compressed bytes of the chunk
+        :returns: 2D array of the chunk's rows
+        """
+        rows = min(self.chunk_rows, self.shape[0] - chunk * self.chunk_rows)
+        data = np.frombuffer(CODECS[self.codec][2](compressed), dtype=self.dtype)
+        return data.reshape(rows, self.shape[1])
+
+    def _read_chunks(self, first: int, last: int) -> list:
+        """
+        Read the compressed bytes of a range of chunks.
+
+        :param first: Number of the first chunk
+        :param last: Number of the chunk after the last
+        :returns: list of bytes per chunk
+        """
+        if first >= last:
+            return []
+        start = self.index[first][0]
+        end = self.index[last - 1][0] + self.index[last - 1][1]
+        with open(self.filename, 'rb') as archive:
+            archive.seek(start)
+            block = archive.read(end - start)
+        return [block[offset - start:offset - start + length]
+                for offset, length in self.index[first:last]]
+
+    def read(self, start: int = 0, stop: int = None, n_workers: int = None) -> np.ndarray:
+        """
+        Read a range of rows, decompressing the chunks that hold them in parallel.
+
+        :param start: First row to read
+        :param stop: Row after the last to read, defaults to the end
+        :param n_workers: Number of decompression threads, defaults to the number of CPUs
+        :returns: 2D array of inflammation data
+        """
+        start, stop, _ = slice(start, stop).indices(len(self))
+        stop = max(start, stop)
+        first, last = start // self.chunk_rows, -(-stop // self.chunk_rows)
+        chunks = self._read_chunks(first, last)
+
+        output = np.empty((stop - start, self.shape[1]), dtype=self.dtype)
+
+        def decompress(chunk):
+            chunk_start = (first + chunk) * self.chunk_rows
+            data = self._decompress_chunk(first + chunk, chunks[chunk])
+            low, high = max(start, chunk_start), min(stop, chunk_start + len(data))
+            output[low - start:high - start] = data[low - chunk_start:high - chunk_start]
+
+        if len(chunks) > 1 and n_workers != 1:
+            # zlib and lzma release the GIL while decompressing, so threads run in parallel
+            with ThreadPoolExecutor(n_workers or os.cpu_count()) as executor:
+                list(executor.map(decompress, range(len(chunks))))
+        else:
+            for chunk in range(len(chunks)):
+                decompress(chunk)
+        return output
+
+    def iter_chunks(self):
+        """
+        Read the archive one chunk at a time.
+
+        :returns: Iterator of 2D arrays, one per chunk
+        """
+        for chunk in range(len(self.index)):
+            yield self._decompress_chunk(chunk, self._read_chunks(chunk, chunk + 1)[0])
+
+
+def read_archive(filename: str, n_workers: int = None) -> np.ndarray:
+    """
+    Read all the inflammation data in an archive.
+
+    :param filename: Filename of the archive
+    :param n_workers: Number of decompression threads, defaults to the number of CPUs
+    :returns: 2D array of inflammation data
+    """
+    return Archive(filename).read(n_workers=n_workers)
+
+
+def csv_to_archive(csv_filename: str, filename: str = None, chunk_rows: int = 4096,
+                   codec: str = 'zlib', compact=False) -> str:
+    """
+    Convert a CSV of inflammation data to an archive.
+
+    :param csv_filename: Filename of the CSV to convert
+    :param filename: Filename of the archive, defaults to the CSV's name with ARCHIVE_SUFFIX
+    :param chunk_rows: Number of rows in each chunk
+    :param codec: Compression codec, 'zlib' or 'lzma'
+    :param compact: Store the data in a compact dtype, see ``models.load_csv``
+    :returns: str, the filename of the archive
+    """
+    if filename is None:
+        filename = os.path.splitext(csv_filename)[0] + ARCHIVE_SUFFIX
+    # Parsed as 2D, so a single patient stays one row and a single day stays one column
+    with open(csv_filename, encoding='utf-8') as csvfile:
+        if compact:
+            data = models._load_csv_compact(csvfile, ndmin=2)  # pylint: disable=protected-access
+        else:
+            data = np.loadtxt(csvfile, delimiter=',', ndmin=2)
+    write_archive(filename, data, chunk_rows, codec)
+    return filename
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description='Convert inflammation CSVs to compressed archives')
+
+    parser.add_argument(
+        'infiles',
+        nargs='+',
+        help='Input CSV(s) containing inflammation series for each patient')
+
+    parser.add_argument(
+        '--codec',
+        default='zlib',
+        choices=list(CODECS),
+        help='Which compression codec should be used?')
+
+    parser.add_argument(
+        '--chunk-rows',
+        type=int,
+        default=4096,
+        help='How many rows should each chunk hold?')
+
+    parser.add_argument(
+        '--compact',
+        action='store_true',
+        help='Store the data in a compact dtype (uint8/uint16/float32)')
+
+    args = parser.parse_args()
+
+    for infile in args.infiles:
+        print(csv_to_archive(infile, chunk_rows=args.chunk_rows, codec=args.codec,
+                             compact=args.compact))
@@ -0,0 +1,173 @@
+"""
+Module for aggregating inflammation statistics per doctor.
+
+All patients' observations are packed into a single 2D array, one row per
+patient and one column per day, with the rows of each doctor's patients held
+together. Per-doctor daily statistics are then computed in one pass with
+segmented reductions (``np.ufunc.reduceat``) over those row ranges, rather
+than by looping over each doctor's patients and their observations.
+"""
+
+import numpy as np
+
+from inflammation.models import Doctor, Patient
+
+
+def pack_patients(patients: list) -> np.ndarray:
+    """
+    Pack patients' observations into a 2D inflammation data array.
+
+    :param patients: List of Patients
+    :returns: np.ndarray with a row per patient and a column per day,
+        NaN where a patient has no observation for a day
+    """
+    rows, days, values = [], [], []
+    for row, patient in enumerate(patients):
+        rows.extend([row] * len(patient.observations))
+        days.extend(observation.day for observation in patient.observations)
+        values.extend(observation.value for observation in patient.observations)
+
+    rows = np.array(rows, dtype=np.intp)
+    days = np.array(days, dtype=np.intp)
+    if np.any(days < 0):
+        raise ValueError('Observation days should not be negative')
+
+    n_days = int(days.max()) + 1 if len(days) else 0
+    if len(np.unique(rows * n_days + days)) != len(days):
+        raise ValueError('Patients should have at most one observation per day')
+
+    data = np.full((len(patients), n_days), np.nan)
+    data[rows, days] = values
+    return data
+
+
+def segment_reductions(data: np.ndarray, starts: np.ndarray) -> tuple:
+    """
+    Calculate the daily sum, count, max and min of segments of rows of a 2D array.
+
+    NaN values are ignored. Segments run from each start to the next, and must
+    not be empty.
+
+    :param data: 2D array of inflammation data, NaN for missing values
+    :param starts: Sorted first row of each segment
+    :returns: tuple of (sum, count, max, min) arrays with a row per segment
+    """
+    missing = np.isnan(data)
+    total = np.add.reduceat(np.where(missing, 0, data), starts, axis=0)
+    count = np.add.reduceat(~missing, starts, axis=0, dtype=np.int64)
+    maximum = np.maximum.reduceat(np.where(missing, -np.inf, data), starts, axis=0)
+    minimum = np.minimum.reduceat(np.where(missing, np.inf, data), starts, axis=0)
+    return total, count, maximum, minimum
+
+
+class CohortStatistics:
+    """Daily inflammation statistics of each doctor's patients."""
+    def __init__(self, doctors: list):
+        """
+        Aggregate the observations of each doctor's patients.
+
+        :param doctors: List of Doctors, with unique names
+        """
+        self._codes = {}
+        for doctor in doctors:
+            if doctor.name in self._codes:
+                raise ValueError("Doctor with name:" + str(doctor.name) + " is not unique")
+            self._codes[doctor.name] = len(self._codes)
+
+        patients = [patient for doctor in doctors for patient in doctor.patients or []]
+        sizes = np.array([len(doctor.patients or []) for doctor in doctors], dtype=np.intp)
+        data = pack_patients(patients)
+
+        self._sum = np.zeros((len(doctors), data.shape[1]))
+        self._count = np.zeros((len(doctors), data.shape[1]), dtype=np.int64)
+        self._max = np.full((len(doctors), data.shape[1]), -np.inf)
+        self._min = np.full((len(doctors), data.shape[1]), np.inf)
+
+        # reduceat cannot reduce an empty segment, so doctors without patients are skipped
+        non_empty = sizes > 0
+        if np.any(non_empty):
+            starts = (np.cumsum(sizes) - sizes)[non_empty]
+            self._sum[non_empty], self._count[non_empty], self._max[non_empty], \
+                self._min[non_empty] = segment_reductions(data, starts)
+
+    def _grow(self, n_days: int) -> None:
+        """
+        Extend the statistics to cover a number of days.
+
+        :param n_days: Number of days to cover
+        """
+        extra = n_days - self._sum.shape[1]
+        if extra <= 0:
+            return
+        padding = ((0, 0), (0, extra))
+        self._sum = np.pad(self._sum, padding)
+        self._count = np.pad(self._count, padding)
+        self._max = np.pad(self._max, padding, constant_values=-np.inf)
+        self._min = np.pad(self._min, padding, constant_values=np.inf)
+
+    def add_patient(self, doctor: Doctor, patient: Patient) -> Patient:
+        """
+        Add a patient to a doctor and update the doctor's statistics.
+
+        :param doctor: The Doctor, one of the aggregated doctors
+        :param patient: The Patient to add
+        :returns: Patient, The Patient that was added
+        """
+        code = self._codes[doctor.name]
+        # Packed first, so a patient with invalid observations is not added to the doctor
+        row = pack_patients([patient])[0]
+        n_patients = len(doctor.patients or [])
+        doctor.add_patient(patient)
+        if len(doctor.patients) == n_patients:
+            return patient
+
+        self._grow(len(row))
+        missing = np.isnan(row)
+        days = slice(0, len(row))
+        self._sum[code, days] += np.where(missing, 0, row)
+        self._count[code, days] += ~missing
+        self._max[code, days] = np.fmax(self._max[code, days], row)
+        self._min[code, days] = np.fmin(self._min[code, days], row)
+        return patient
+
+    def _by_doctor(self, values: np.ndarray) -> dict:
+        """
+        Key rows of per-doctor values by doctor name.
+
+        :param values: Array with a row per doctor
+        :returns: dict of doctor name -> row
+        """
+        return {name: values[code] for name, code in self._codes.items()}
+
+    def daily_count(self) -> dict:
+        """
+        Count each doctor's patients' observations for each day.
+
+        :returns: dict of doctor name -> array of counts
+        """
+        return self._by_doctor(self._count.copy())
+
+    def daily_mean(self) -> dict:
+        """
+        Calculate the daily mean of each doctor's patients.
+
+        :returns: dict of doctor name -> array of mean values, NaN for days without observations
+        """
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self._by_doctor(self._sum / self._count)
+
+    def daily_max(self) -> dict:
+        """
+        Calculate the daily max of each doctor's patients.
+
+        :returns: dict of doctor name -> array of max values, NaN for days without observations
+        """
+        return self._by_doctor(np.where(self._count > 0, self._max, np.nan))
+
+    def daily_min(self) -> dict:
+        """
+        Calculate the daily min of each doctor's patients.
+
+        :returns: dict of doctor name -> array of min values, NaN for days without observations
+        """
+        return self._by_doctor(np.where(self._count > 0, self._min, np.nan))
@@ -6,18 +6,172 @@ The Model layer is responsible for the 'business logic' part of the software.
 Patients' data is held in an inflammation table (2D array) where each row contains
 inflammation data for a single patient taken over a number of days
 and each column represents a single day across all patients.
+
+By default the table is held as float64. In compact mode (``load_csv(...,
+compact=True)``) it is stored in a narrower dtype - uint8 or uint16 when all
+readings are non-negative integers, which is exact, and float32 otherwise,
+which rounds each reading to float32 precision (exact only for integers up
+to 2**24). The daily statistics and ``patient_normalise`` accept either form:
+means are always accumulated in float64, and normalisation of compact data
+is computed in float32. Compact results match the defaults to within
+``COMPACT_RTOL``, the float32 rounding bound.
 """
 
+import os
+from itertools import islice
+
 import numpy as np
 
+COMPACT_RTOL = 1e-6
+
+ARCHIVE_SUFFIX = '.inflz'
+
+_DATASOURCE_SUFFIXES = ('.gz', '.bz2', '.xz', '.lzma')
+
+# Rows processed at once when choosing and converting to a compact dtype, so the
+# temporaries needed are bounded by this rather than by the size of the table
+_COMPACT_BLOCK_ROWS = 65536
+
+
+def _compact_summary(block: np.ndarray) -> tuple:
+    """
+    Summarise a block of inflammation data for choosing a compact dtype.
+
+    :param block: Array of inflammation data
+    :returns: tuple of (whether all values are non-negative integers, max value)
+    """
+    if not block.size:
+        return True, 0
+    minimum, maximum = np.min(block), np.max(block)
+    # NaN fails both comparisons, and -inf/inf fail one of them
+    if not (minimum >= 0 and maximum < np.inf):
+        return False, maximum
+    if not np.issubdtype(block.dtype, np.integer) and not np.array_equal(block, np.floor(block)):
+        return False, maximum
+    return True, maximum
+
+
+def _dtype_from_summaries(summaries: list) -> np.dtype:
+    """
+    Choose the compact dtype for data summarised by ``_compact_summary``.
+
+    :param summaries: List of (integral, max) tuples, one per block
+    :returns: np.dtype
+    """
+    if summaries and all(integral for integral, _ in summaries):
+        maximum = max(maximum for _, maximum in summaries)
+        for dtype in (np.uint8, np.uint16):
+            if maximum <= np.iinfo(dtype).max:
+                return np.dtype(dtype)
+    return np.dtype(np.float32)
+
+
+def compact_dtype(data: np.ndarray) -> np.dtype:
+    """
+    Find the narrowest dtype that can store an inflammation data array.
+
+    :param data: Array of inflammation data
+    :returns: uint8 or uint16 for non-negative integer data, float32 otherwise
+    """
+    if not data.size:
+        return np.dtype(np.float32)
+    rows = np.atleast_1d(data)
+    return _dtype_from_summaries([_compact_summary(rows[start:start + _COMPACT_BLOCK_ROWS])
+                                  for start in range(0, len(rows), _COMPACT_BLOCK_ROWS)])
+
 
-def load_csv(filename):
+def _load_csv_compact(lines, ndmin: int = 0) -> np.ndarray:
     """
-    Load a Numpy array from a CSV
+    Load CSV lines into the dtype chosen by ``compact_dtype``, a block of rows at a time.
 
-    :param filename: Filename of CSV to load
+    Each block is parsed as float64 and held as float32 until the dtype is known,
+    which is exact for the integers uint8 and uint16 can hold, so the full table
+    is never held as float64.
+
+    :param lines: Open CSV file, or other iterable of CSV lines
+    :param ndmin: Minimum number of dimensions of the result, as for ``np.loadtxt``
+    :returns: np.ndarray, shaped like the result of ``np.loadtxt``
+    """
+    lines = iter(lines)
+    blocks, summaries = [], []
+    while True:
+        block_lines = list(islice(lines, _COMPACT_BLOCK_ROWS))
+        if not block_lines:
+            break
+        block = np.loadtxt(block_lines, delimiter=',', ndmin=2)
+        summaries.append(_compact_summary(block))
+        blocks.append(block.astype(np.float32))
+
+    if not blocks:
+        return np.empty((0,) * max(ndmin, 1), dtype=np.float32)
+
+    data = np.empty((sum(len(block) for block in blocks), blocks[0].shape[1]),
+                    dtype=_dtype_from_summaries(summaries))
+    start = 0
+    blocks.reverse()
+    while blocks:
+        block = blocks.pop()
+        data[start:start + len(block)] = block
+        start += len(block)
+    if ndmin == 2:
+        return data
+    return np.squeeze(data)
+
+
+def _is_path(filename) -> bool:
+    """
+    Check whether something to load is a path, rather than a file object or lines.
+
+    :param filename: What to load
+    :returns: bool
+    """
+    return isinstance(filename, (str, bytes, os.PathLike))
+
+
+def is_archive(filename) -> bool:
     """
-    return np.loadtxt(fname=filename, delimiter=',')
+    Check whether a path names an archive written by ``inflammation.archive``, from its suffix.
+
+    :param filename: What to load
+    :returns: bool
+    """
+    return _is_path(filename) and os.fsdecode(filename).endswith(ARCHIVE_SUFFIX)
+
+
+def load_csv(filename, compact=False):
+    """
+    Load a Numpy array from a CSV, or from an archive written by ``inflammation.archive``
+
+    :param filename: Filename of CSV or archive to load, or anything ``np.loadtxt``
+        accepts, e.g. an open file or a list of lines
+    :param compact: Store the data in a compact dtype, see ``compact_dtype``
+    """
+    if is_archive(filename):
+        # Only imported for archives, so loading a CSV does not import the codecs
+        from inflammation import archive  # pylint: disable=import-outside-toplevel
+        # Archives hold 2D data, which is squeezed to match the shape np.loadtxt gives the CSV
+        data = np.squeeze(archive.read_archive(filename))
+        # Archives may hold compact data, but are loaded as float64 like a CSV by default
+        dtype = compact_dtype(data) if compact else np.float64
+        return data.astype(dtype, copy=False)
+
+    # np.loadtxt opens filenames through numpy's DataSource, which imports shutil and
+    # with it the bz2/lzma codecs. Plain local files are opened directly to keep that
+    # off the CLI's startup path; URLs and compressed files are still left to numpy.
+    if _is_path(filename) and os.path.isfile(filename) \
+            and not os.fsdecode(filename).endswith(_DATASOURCE_SUFFIXES):
+        with open(filename, encoding='utf-8') as csvfile:
+            if compact:
+                return _load_csv_compact(csvfile)
+            return np.loadtxt(csvfile, delimiter=',')
+
+    if compact and not _is_path(filename):
+        return _load_csv_compact(filename)
+
+    data = np.loadtxt(fname=filename, delimiter=',')
+    if compact:
+        data = data.astype(compact_dtype(data))
+    return data
 
 
 def daily_mean(data: np.ndarray) -> np.ndarray:
@@ -27,7 +181,7 @@ def daily_mean(data: np.ndarray) -> np.ndarray:
     :param data: 2D array of data
     :returns: Array of mean values for the day
     """
-    return np.mean(data, axis=0)
+    return np.mean(data, axis=0, dtype=np.promote_types(data.dtype, np.float64))
 
 
 def daily_max(data: np.ndarray) -> np.ndarray:
@@ -53,7 +207,8 @@ def daily_min(data: np.ndarray) -> np.ndarray:
 def patient_normalise(data: np.ndarray) -> list:
     """
     Normalise patient data between 0 and 1 of a 2D inflammation data array.
-    Any NaN values are ignored, and normalised to 0
+    Any NaN values are ignored, and normalised to 0.
+    Compact (uint8, uint16 or float32) data is normalised in float32.
 
     :param data: 2d array of inflammation data
     :returns: np.ndarray
@@ -71,8 +226,9 @@ def patient_normalise(data: np.ndarray) -> list:
         raise ValueError('Data values should not be negative')
 
     patient_max = np.nanmax(data, axis=1)
+    result_dtype = np.result_type(data.dtype, np.float32)
     with np.errstate(invalid='ignore', divide='ignore'):
-        normalised = data / patient_max[:, np.newaxis]
+        normalised = np.divide(data, patient_max[:, np.newaxis], dtype=result_dtype)
     normalised[np.isnan(normalised)] = 0
     normalised[normalised < 0] = 0
     return normalised
@@ -162,6 +318,18 @@ class Patient(Person):
         return True
 
 
+def patient_from_row(name: str, row: np.ndarray) -> Patient:
+    """
+    Create a Patient from a row of a 2D inflammation data array
+
+    :param name: The name of the patient
+    :param row: The patient's inflammation data, one value per day
+    :returns: Patient, with an Observation for each day
+    """
+    observations = [Observation(value, day) for day, value in enumerate(np.asarray(row).tolist())]
+    return Patient(name, observations)
+
+
 class Doctor(Person):
     """A doctor in an inflammation study."""
     def __init__(self, name, patients=None):
@@ -0,0 +1,163 @@
+"""
+Module for running per-patient computations across worker processes.
+
+The inflammation table is copied once into a ``multiprocessing.shared_memory``
+block. Worker processes attach to it without copying, each processes a range
+of rows (patients) and writes its result rows into a shared output block, so
+the table is never pickled to the workers. The results are returned in the
+shared output block itself, without copying. Requires Python 3.8+.
+"""
+
+import math
+import os
+import sys
+import weakref
+from multiprocessing import Pool
+
+if sys.version_info < (3, 8):
+    raise ImportError('inflammation.parallel requires Python 3.8+ '
+                      'for multiprocessing.shared_memory')
+
+from multiprocessing.shared_memory import SharedMemory  # pylint: disable=wrong-import-position
+
+import numpy as np  # pylint: disable=wrong-import-position
+
+from inflammation import models  # pylint: disable=wrong-import-position
+
+_worker_state = {}
+
+
+def _create_shared_array(shape: tuple, dtype: np.dtype) -> tuple:
+    """
+    Create a shared memory block and an array view over it.
+
+    :param shape: Shape of the array
+    :param dtype: Dtype of the array
+    :returns: tuple of (SharedMemory, np.ndarray)
+    """
+    size = max(int(np.prod(shape)) * np.dtype(dtype).itemsize, 1)
+    shm = SharedMemory(create=True, size=size)
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def _attach_shared_array(name: str, shape: tuple, dtype: np.dtype) -> tuple:
+    """
+    Attach to an existing shared memory block and create an array view over it.
+
+    :param name: Name of the shared memory block
+    :param shape: Shape of the array
+    :param dtype: Dtype of the array
+    :returns: tuple of (SharedMemory, np.ndarray)
+    """
+    shm = SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def _init_worker(func, data_spec: tuple, output_spec: tuple) -> None:
+    """
+    Attach a worker process to the shared input and output arrays.
+
+    :param func: The row function to apply
+    :param data_spec: (name, shape, dtype) of the shared input array
+    :param output_spec: (name, shape, dtype) of the shared output array
+    """
+    # The SharedMemory objects are kept so the views stay valid
+    _worker_state['func'] = func
+    _worker_state['data_shm'], _worker_state['data'] = _attach_shared_array(*data_spec)
+    _worker_state['output_shm'], _worker_state['output'] = _attach_shared_array(*output_spec)
+
+
+def _process_rows(bounds: tuple) -> None:
+    """
+    Apply the row function to a range of rows of the shared input array.
+
+    :param bounds: (start, stop) of the row range
+    """
+    start, stop = bounds
+    _worker_state['output'][start:stop] = _worker_state['func'](_worker_state['data'][start:stop])
+
+
+def row_ranges(n_rows: int, chunk_size: int) -> list:
+    """
+    Split a number of rows into contiguous ranges.
+
+    :param n_rows: Total number of rows
+    :param chunk_size: Maximum number of rows in each range
+    :returns: list of (start, stop) tuples
+    """
+    if chunk_size < 1:
+        raise ValueError('Chunk size should be positive')
+    return [(start, min(start + chunk_size, n_rows)) for start in range(0, n_rows, chunk_size)]
+
+
+def map_rows(func, data: np.ndarray, n_workers: int = None, chunk_size: int = None) -> np.ndarray:
+    """
+    Apply a row-wise function to a 2D inflammation data array in parallel.
+
+    ``func`` takes a 2D block of rows and returns an array with one result row
+    per input row. It must be picklable, i.e. defined at module level.
+    The output shape and dtype are found by applying it to the first row.
+
+    :param func: Function to apply to each block of rows
+    :param data: 2D array of inflammation data
+    :param n_workers: Number of worker processes, defaults to the number of CPUs
+    :param chunk_size: Number of rows per task, defaults to 4 tasks per worker
+    :returns: np.ndarray of results for all rows, held in shared memory
+        until it is released
+    """
+    if not isinstance(data, np.ndarray):
+        raise TypeError('Data should be of type ndarray')
+
+    if len(data.shape) != 2:
+        raise ValueError('Data should be 2D')
+
+    if len(data) == 0:
+        raise ValueError('Data should not be empty')
+
+    n_workers = n_workers or os.cpu_count() or 1
+    if chunk_size is None:
+        chunk_size = math.ceil(len(data) / (n_workers * 4))
+
+    probe = np.asarray(func(data[:1]))
+    output_shape = (len(data),) + probe.shape[1:]
+
+    data_shm, shared_data = _create_shared_array(data.shape, data.dtype)
+    try:
+        output_shm, result = _create_shared_array(output_shape, probe.dtype)
+        try:
+            shared_data[...] = data
+            initargs = (
+                func,
+                (data_shm.name, data.shape, data.dtype),
+                (output_shm.name, output_shape, probe.dtype),
+            )
+            with Pool(n_workers, initializer=_init_worker, initargs=initargs) as pool:
+                pool.map(_process_rows, row_ranges(len(data), chunk_size))
+        except BaseException:
+            del result
+            output_shm.close()
+            raise
+        finally:
+            output_shm.unlink()
+    finally:
+        del shared_data
+        data_shm.close()
+        data_shm.unlink()
+
+    # The result is returned in place rather than copied out of the shared block.
+    # Its name is already unlinked, and the mapping is closed once the array is released.
+    weakref.finalize(result, output_shm.close).atexit = False
+    return result
+
+
+def parallel_patient_normalise(data: np.ndarray, n_workers: int = None,
+                               chunk_size: int = None) -> np.ndarray:
+    """
+    Normalise patient data between 0 and 1 using multiple worker processes.
+
+    :param data: 2D array of inflammation data
+    :param n_workers: Number of worker processes, defaults to the number of CPUs
+    :param chunk_size: Number of rows per task
+    :returns: np.ndarray, as returned by ``models.patient_normalise``
+    """
+    return map_rows(models.patient_normalise, data, n_workers, chunk_size)
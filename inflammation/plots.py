@@ -0,0 +1,25 @@
+"""Module containing code for plotting inflammation data."""
+
+from matplotlib import pyplot as plt
+
+
+def visualize(data_dict: dict) -> None:
+    """
+    Display plots of basic statistical properties of the inflammation data.
+
+    :param data_dict: Dictionary of name -> data to plot
+    :returns: None
+    """
+
+    num_plots = len(data_dict)
+    fig = plt.figure(figsize=((3 * num_plots) + 1, 3.0))
+
+    for i, (name, data) in enumerate(data_dict.items()):
+        axes = fig.add_subplot(1, num_plots, i + 1)
+
+        axes.set_ylabel(name)
+        axes.plot(data)
+
+    fig.tight_layout()
+
+    plt.show()
@@ -0,0 +1,295 @@
+"""
+Module for finding patients with similar inflammation series.
+
+A PatientIndex holds the rows of a 2D inflammation data array and finds the
+k rows closest (by Euclidean distance) to query series. Distances are computed
+in float64 for blocks of queries against blocks of rows, with one matrix
+multiply per pair of blocks, so memory use is bounded by the block size rather
+than the number of patients or queries.
+
+For large cohorts the index can project the rows onto their first principal
+components. Queries then shortlist candidates in the reduced space and only
+compute exact distances for those, which is faster but approximate.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from inflammation import models
+
+Hit = namedtuple('Hit', ['index', 'distance', 'patient', 'doctor'])
+
+
+def _block_squared_norms(data: np.ndarray) -> np.ndarray:
+    """
+    Calculate the squared Euclidean norm of each row.
+
+    :param data: 2D array
+    :returns: Array of squared norms
+    """
+    return np.einsum('ij,ij->i', data, data)
+
+
+def _principal_components(data: np.ndarray, n_components: int, block_size: int) -> tuple:
+    """
+    Find the mean and first principal components of the rows, one block at a time.
+
+    :param data: 2D array of data
+    :param n_components: Number of components to keep
+    :param block_size: Number of rows per block
+    :returns: tuple of (mean, components), components having one column per component
+    """
+    mean = np.zeros(data.shape[1])
+    for start in range(0, len(data), block_size):
+        mean += data[start:start + block_size].sum(axis=0, dtype=np.float64)
+    mean /= len(data)
+
+    covariance = np.zeros((data.shape[1], data.shape[1]))
+    for start in range(0, len(data), block_size):
+        centred = data[start:start + block_size] - mean
+        covariance += centred.T @ centred
+
+    _, eigenvectors = np.linalg.eigh(covariance)
+    return mean, eigenvectors[:, ::-1][:, :n_components]
+
+
+class PatientIndex:
+    """A nearest neighbour index over the rows of an inflammation data array."""
+    def __init__(self, data: np.ndarray, normalise=False, block_size=1024,
+                 n_components=None, names=None, doctors=None):
+        """
+        Build an index over a 2D inflammation data array.
+
+        :param data: 2D array of inflammation data, one row per patient
+        :param normalise: Index the series normalised by ``models.patient_normalise``
+        :param block_size: Number of rows, and of queries, compared at once
+        :param n_components: Number of principal components for the prefilter,
+            or None to always compute exact distances
+        :param names: Patient name for each row, used to build Patient records
+        :param doctors: Doctors whose patients are matched to rows by name
+        """
+        if not isinstance(data, np.ndarray):
+            raise TypeError('Data should be of type ndarray')
+
+        if len(data.shape) != 2:
+            raise ValueError('Data should be 2D')
+
+        if len(data) == 0:
+            raise ValueError('Data should not be empty')
+
+        if block_size < 1:
+            raise ValueError('Block size should be positive')
+
+        if n_components is not None and not 1 <= n_components <= data.shape[1]:
+            raise ValueError('Number of components should be between 1 and the number of days')
+
+        if names is not None and len(names) != len(data):
+            raise ValueError('There should be one name per patient')
+
+        self.data = data
+        self.normalise = normalise
+        self.block_size = block_size
+        self.names = names
+
+        self._doctors = {}
+        for doctor in doctors or []:
+            for patient in doctor.patients or []:
+                self._doctors[patient.name] = (doctor, patient)
+
+        vectors = models.patient_normalise(data) if normalise else data
+        # Distances are computed as |q|^2 - 2 q.x + |x|^2, which cancels badly in
+        # float32, so compact (uint8/uint16/float32) data is indexed as float64
+        self._vectors = vectors.astype(np.result_type(vectors.dtype, np.float64), copy=False)
+        self._norms = _block_squared_norms(self._vectors)
+
+        self._mean = None
+        self._components = None
+        self._reduced = None
+        self._reduced_norms = None
+        if n_components is not None:
+            self._mean, self._components = _principal_components(
+                self._vectors, n_components, block_size)
+            self._reduced = self._project(self._vectors)
+            self._reduced_norms = _block_squared_norms(self._reduced)
+
+    def __len__(self):
+        return len(self.data)
+
+    def _project(self, vectors: np.ndarray) -> np.ndarray:
+        """
+        Project series onto the principal components.
+
+        :param vectors: 2D array of series
+        :returns: 2D array of projected series
+        """
+        projected = np.empty((len(vectors), self._components.shape[1]), dtype=self._vectors.dtype)
+        for start in range(0, len(vectors), self.block_size):
+            block = vectors[start:start + self.block_size]
+            projected[start:start + self.block_size] = (block - self._mean) @ self._components
+        return projected
+
+    def _prepare_queries(self, queries) -> np.ndarray:
+        """
+        Convert query series into the form the index holds.
+
+        :param queries: 2D array of query series
+        :returns: 2D array of query vectors
+        """
+        if queries.shape[1] != self.data.shape[1]:
+            raise ValueError('Queries should have one value per day')
+
+        if self.normalise:
+            queries = models.patient_normalise(queries)
+        return queries.astype(self._vectors.dtype, copy=False)
+
+    def _search_blocks(self, queries: np.ndarray, vectors: np.ndarray,
+                       norms: np.ndarray, k: int) -> tuple:
+        """
+        Find the k closest rows to each query, one block of queries and rows at a time.
+
+        :param queries: 2D array of query vectors
+        :param vectors: 2D array of indexed vectors
+        :param norms: Squared norms of the indexed vectors
+        :param k: Number of rows to find
+        :returns: tuple of (indices, squared distances), sorted by distance
+        """
+        indices = np.empty((len(queries), k), dtype=np.intp)
+        distances = np.empty((len(queries), k), dtype=vectors.dtype)
+        for start in range(0, len(queries), self.block_size):
+            rows = slice(start, start + self.block_size)
+            indices[rows], distances[rows] = self._search_query_block(
+                queries[rows], vectors, norms, k)
+        return indices, distances
+
+    def _search_query_block(self, queries: np.ndarray, vectors: np.ndarray,
+                            norms: np.ndarray, k: int) -> tuple:
+        """
+        Find the k closest rows to each of a block of queries, one block of rows at a time.
+
+        :param queries: 2D array of at most ``block_size`` query vectors
+        :param vectors: 2D array of indexed vectors
+        :param norms: Squared norms of the indexed vectors
+        :param k: Number of rows to find
+        :returns: tuple of (indices, squared distances), sorted by distance
+        """
+        query_norms = _block_squared_norms(queries)[:, np.newaxis]
+        best_indices = np.empty((len(queries), 0), dtype=np.intp)
+        best_distances = np.empty((len(queries), 0), dtype=vectors.dtype)
+
+        for start in range(0, len(vectors), self.block_size):
+            block = vectors[start:start + self.block_size]
+            distances = query_norms - 2 * (queries @ block.T) + norms[start:start + len(block)]
+            indices = np.broadcast_to(np.arange(start, start + len(block)), distances.shape)
+
+            distances = np.concatenate([best_distances, distances], axis=1)
+            indices = np.concatenate([best_indices, indices], axis=1)
+            if distances.shape[1] > k:
+                keep = np.argpartition(distances, k - 1, axis=1)[:, :k]
+                distances = np.take_along_axis(distances, keep, axis=1)
+                indices = np.take_along_axis(indices, keep, axis=1)
+            best_distances, best_indices = distances, indices
+
+        order = np.argsort(best_distances, axis=1)
+        best_distances = np.maximum(np.take_along_axis(best_distances, order, axis=1), 0)
+        return np.take_along_axis(best_indices, order, axis=1), best_distances
+
+    def _rerank(self, queries: np.ndarray, shortlist: np.ndarray, k: int) -> tuple:
+        """
+        Find the k closest of each query's shortlisted rows by exact distance.
+
+        Distances are computed from the differences rather than from norms, so
+        they do not suffer cancellation between large norms. Queries are
+        re-ranked in blocks, so the shortlisted rows gathered at once number
+        about ``block_size`` rather than queries * candidates.
+
+        :param queries: 2D array of query vectors
+        :param shortlist: 2D array of candidate row indices for each query
+        :param k: Number of rows to find
+        :returns: tuple of (indices, squared distances), sorted by distance
+        """
+        queries_per_block = max(1, self.block_size // shortlist.shape[1])
+        indices = np.empty((len(queries), k), dtype=np.intp)
+        distances = np.empty((len(queries), k), dtype=self._vectors.dtype)
+
+        for start in range(0, len(queries), queries_per_block):
+            rows = slice(start, start + queries_per_block)
+            candidates = shortlist[rows]
+            differences = self._vectors[candidates] - queries[rows, np.newaxis, :]
+            exact = np.einsum('ijk,ijk->ij', differences, differences)
+            order = np.argsort(exact, axis=1)[:, :k]
+            indices[rows] = np.take_along_axis(candidates, order, axis=1)
+            distances[rows] = np.take_along_axis(exact, order, axis=1)
+        return indices, distances
+
+    def query(self, queries: np.ndarray, k: int = 1, candidates: int = None) -> tuple:
+        """
+        Find the k patients whose series are closest to each query series.
+
+        :param queries: Query series, a 1D array or a 2D array with one query per row
+        :param k: Number of patients to find for each query
+        :param candidates: Number of candidates to shortlist with the principal
+            component prefilter, defaults to 10 * k. Ignored without a prefilter.
+        :returns: tuple of (indices, distances), with one row per query
+            (or 1D for a 1D query) sorted from closest to furthest
+        """
+        if k < 1:
+            raise ValueError('k should be positive')
+
+        queries = np.asarray(queries)
+        single = queries.ndim == 1
+        vectors = self._prepare_queries(np.atleast_2d(queries))
+        k = min(k, len(self))
+
+        if self._reduced is None:
+            shortlist, _ = self._search_blocks(vectors, self._vectors, self._norms, k)
+            # Recompute the distances of the rows found exactly, as the blocked search's
+            # |q|^2 - 2 q.x + |x|^2 loses precision when readings are large and close
+            indices, distances = self._rerank(vectors, shortlist, k)
+        else:
+            candidates = min(max(candidates or 10 * k, k), len(self))
+            reduced = self._project(vectors)
+            shortlist, _ = self._search_blocks(reduced, self._reduced, self._reduced_norms, candidates)
+
+            indices, distances = self._rerank(vectors, shortlist, k)
+
+        distances = np.sqrt(distances)
+        if single:
+            return indices[0], distances[0]
+        return indices, distances
+
+    def record(self, index: int) -> tuple:
+        """
+        Get the Patient and Doctor records for a row of the index.
+
+        A patient found among the index's doctors' patients is returned with
+        their doctor, otherwise a Patient is created from the row.
+
+        :param index: The row of the patient
+        :returns: tuple of (Patient, Doctor or None)
+        """
+        name = self.names[index] if self.names is not None else 'UNKNOWN'
+        if name in self._doctors:
+            doctor, patient = self._doctors[name]
+            return patient, doctor
+        return models.patient_from_row(name, self.data[index]), None
+
+    def search(self, queries: np.ndarray, k: int = 1, candidates: int = None) -> list:
+        """
+        Find the k patients whose series are closest to each query series, as records.
+
+        :param queries: Query series, a 1D array or a 2D array with one query per row
+        :param k: Number of patients to find for each query
+        :param candidates: Number of candidates to shortlist, see ``query``
+        :returns: list of Hits for a 1D query, or a list of lists of Hits per query
+        """
+        indices, distances = self.query(queries, k, candidates)
+        single = indices.ndim == 1
+        indices, distances = np.atleast_2d(indices), np.atleast_2d(distances)
+
+        hits = [[Hit(int(index), float(distance), *self.record(index))
+                 for index, distance in zip(row_indices, row_distances)]
+                for row_indices, row_distances in zip(indices, distances)]
+        if single:
+            return hits[0]
+        return hits
@@ -0,0 +1,237 @@
+"""
+Module containing a long-running query server for inflammation data.
+
+The server loads each data file once and keeps it in memory, reloading it
+only when the file changes on disk. Queries are answered over HTTP on a
+local address by a fixed pool of threads:
+
+- ``/record?file=<file>&patient=<n>`` - a patient's record as text
+- ``/json?file=<file>&patient=<n>`` - a patient's record as json
+- ``/statistics?file=<file>`` - daily average, max and min as json
+
+``file`` may be omitted when the server was started with a single file.
+Only files given when starting the server can be queried.
+"""
+
+import json
+import math
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from inflammation import models, views
+
+
+class DataStore:
+    """A thread-safe cache of loaded inflammation data files."""
+    def __init__(self, filenames, compact=False):
+        self.compact = compact
+        self._cache = {}
+        self._filenames = list(filenames)
+        # One lock per file, so reloading one file does not hold up queries on others
+        self._locks = {filename: threading.Lock() for filename in self._filenames}
+        for filename in self._filenames:
+            self.get(filename)
+
+    def resolve(self, filename: str = None) -> str:
+        """
+        Find which of the served files a query refers to
+
+        :param filename:  The requested filename, or None if there is a single file
+        :returns: str, The served filename
+        """
+        if filename is None:
+            if len(self._filenames) != 1:
+                raise KeyError("A file must be given when serving more than one file")
+            return self._filenames[0]
+
+        if filename not in self._filenames:
+            raise KeyError("File:" + str(filename) + " is not being served")
+        return filename
+
+    def get(self, filename: str):
+        """
+        Get the data for a file, reloading it if it has changed on disk
+
+        While a file is being reloaded, or if it cannot be read or parsed (e.g.
+        it is missing or half-written), the last data loaded for it is returned.
+
+        :param filename:  The filename
+        :returns: np.ndarray, The inflammation data
+        """
+        cached = self._cache.get(filename)
+        lock = self._locks[filename]
+        if not lock.acquire(blocking=cached is None):
+            # Another thread is reloading the file
+            return cached[1]
+
+        try:
+            cached = self._cache.get(filename)
+            try:
+                mtime = os.stat(filename).st_mtime_ns
+                if cached is None or cached[0] != mtime:
+                    cached = (mtime, models.load_csv(filename, compact=self.compact))
+                    self._cache[filename] = cached
+            except (OSError, ValueError):
+                if cached is None:
+                    raise
+        finally:
+            lock.release()
+        return cached[1]
+
+
+def _get_patient(store: DataStore, params: dict) -> models.Patient:
+    """
+    Get the patient a record query refers to
+
+    :param store:  The DataStore to query
+    :param params:  The query parameters
+    :returns: Patient, The requested patient
+    """
+    data = store.get(store.resolve(params.get('file')))
+    patient = int(params.get('patient', 0))
+    if patient < 0 or patient >= len(data):
+        raise IndexError("Patient:" + str(patient) + " is out of bounds")
+    return models.patient_from_row('UNKNOWN', data[patient])
+
+
+def query_record(store: DataStore, params: dict) -> tuple:
+    """
+    Answer a record query
+
+    :param store:  The DataStore to query
+    :param params:  The query parameters
+    :returns: tuple of (content type, body)
+    """
+    return 'text/plain', views.format_patient_record(_get_patient(store, params))
+
+
+def query_json(store: DataStore, params: dict) -> tuple:
+    """
+    Answer a json query
+
+    :param store:  The DataStore to query
+    :param params:  The query parameters
+    :returns: tuple of (content type, body)
+    """
+    return 'application/json', views.format_patient_as_json(_get_patient(store, params))
+
+
+def _json_values(values) -> list:
+    """
+    Convert an array of values to a list that can be written as json
+
+    :param values:  Array of values
+    :returns: list, with None for NaN values, which json cannot represent
+    """
+    return [None if math.isnan(value) else value for value in values.tolist()]
+
+
+def query_statistics(store: DataStore, params: dict) -> tuple:
+    """
+    Answer a statistics query
+
+    :param store:  The DataStore to query
+    :param params:  The query parameters
+    :returns: tuple of (content type, body)
+    """
+    data = store.get(store.resolve(params.get('file')))
+    output = {
+        'average': _json_values(models.daily_mean(data)),
+        'max': _json_values(models.daily_max(data)),
+        'min': _json_values(models.daily_min(data)),
+    }
+    return 'application/json', json.dumps(output, allow_nan=False)
+
+
+QUERIES = {
+    '/record': query_record,
+    '/json': query_json,
+    '/statistics': query_statistics,
+}
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    """HTTP request handler answering queries from the server's DataStore."""
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Answer a GET request"""
+        url = urlparse(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+        query = QUERIES.get(url.path)
+        if query is None:
+            self.send_error(404, "Unknown query: " + url.path)
+            return
+
+        try:
+            content_type, body = query(self.server.store, params)
+        except KeyError as error:
+            self.send_error(404, str(error))
+            return
+        except OSError as error:
+            self.send_error(503, str(error))
+            return
+        except (ValueError, IndexError) as error:
+            self.send_error(400, str(error))
+            return
+
+        encoded = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', content_type + '; charset=utf-8')
+        self.send_header('Content-Length', str(len(encoded)))
+        self.end_headers()
+        self.wfile.write(encoded)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        """Only log requests when the server is verbose"""
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class QueryServer(HTTPServer):
+    """HTTP server answering requests from a fixed pool of threads."""
+    def __init__(self, address, store: DataStore, max_workers: int = None, verbose=False):
+        self.executor = ThreadPoolExecutor(max_workers)
+        self.store = store
+        self.verbose = verbose
+        super().__init__(address, QueryHandler)
+
+    def process_request(self, request, client_address):
+        """Hand a request over to the thread pool"""
+        self.executor.submit(self._process_request_thread, request, client_address)
+
+    def _process_request_thread(self, request, client_address):
+        """Handle a request in a pool thread"""
+        try:
+            self.finish_request(request, client_address)
+        except Exception:  # pylint: disable=broad-except
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        """Stop listening and wait for in-flight requests to finish"""
+        super().server_close()
+        self.executor.shutdown(wait=True)
+
+
+def serve(filenames, host='127.0.0.1', port=8000, max_workers=None, compact=False) -> None:
+    """
+    Load data files and answer queries about them until interrupted
+
+    :param filenames:  The data files to serve
+    :param host:  The address to listen on
+    :param port:  The port to listen on
+    :param max_workers:  The number of threads answering requests
+    :param compact:  Store the data in a compact dtype
+    :returns: None
+    """
+    store = DataStore(filenames, compact=compact)
+    with QueryServer((host, port), store, max_workers, verbose=True) as server:
+        print(f"Serving {len(filenames)} file(s) on http://{host}:{server.server_port}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
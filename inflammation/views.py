@@ -1,11 +1,25 @@
-"""Module containing code for plotting inflammation data."""
+"""Module containing code for displaying inflammation data."""
 
+import importlib
 import json
-from matplotlib import pyplot as plt
+from collections import namedtuple
 from inflammation import serializers
 from inflammation.models import Patient
 
 
+def format_patient_record(patient: Patient) -> str:
+    """
+    Format data for a single patient as text
+
+    :param patient: The patient to format
+    :returns: str, the patient's name followed by a line per observation
+    """
+    lines = [patient.name]
+    for obs in patient.observations:
+        lines.append(f"{obs.day} {obs.value}")
+    return "\n".join(lines)
+
+
 def display_patient_record(patient: Patient) -> None:
     """
     Display data for a single patient
@@ -13,9 +27,18 @@ def display_patient_record(patient: Patient) -> None:
     :param patient: The patient to display
     :returns: None
     """
-    print(patient.name)
-    for obs in patient.observations:
-        print(obs.day, obs.value)
+    print(format_patient_record(patient))
+
+
+def format_patient_as_json(patient: Patient) -> str:
+    """
+    Format data for a single patient in json format.
+
+    :param patient: The patient to format
+    :returns: str, the serialized patient
+    """
+    output = serializers.PatientJSONSerializer.serialize([patient])
+    return json.dumps(output, indent=4, sort_keys=True)
 
 
 def display_patient_as_json(patient: Patient) -> None:
@@ -25,8 +48,7 @@ def display_patient_as_json(patient: Patient) -> None:
     :param patient: The patient to display
     :returns: None
     """
-    output = serializers.PatientJSONSerializer.serialize([patient])
-    print(json.dumps(output, indent=4, sort_keys=True))
+    print(format_patient_as_json(patient))
 
 
 def display_patient_as_csv(patient: Patient) -> None:
@@ -44,19 +66,34 @@ def visualize(data_dict: dict) -> None:
     """
     Display plots of basic statistical properties of the inflammation data.
 
+    Matplotlib is only imported when this view is used, see ``inflammation.plots``.
+
     :param data_dict: Dictionary of name -> data to plot
     :returns: None
     """
+    from inflammation import plots  # pylint: disable=import-outside-toplevel
+    plots.visualize(data_dict)
+
 
-    num_plots = len(data_dict)
-    fig = plt.figure(figsize=((3 * num_plots) + 1, 3.0))
+# Views available to the controller. Each is imported only when it is selected,
+# so its dependencies are not loaded by other views - e.g. matplotlib is only
+# imported for 'visualize'. 'data' is the kind of
+# input the view takes: a dict of daily 'statistics' or a single 'patient'.
+ViewSpec = namedtuple('ViewSpec', ['module', 'function', 'data'])
 
-    for i, (name, data) in enumerate(data_dict.items()):
-        axes = fig.add_subplot(1, num_plots, i + 1)
+VIEWS = {
+    'visualize': ViewSpec('inflammation.plots', 'visualize', 'statistics'),
+    'record': ViewSpec('inflammation.views', 'display_patient_record', 'patient'),
+    'json': ViewSpec('inflammation.views', 'display_patient_as_json', 'patient'),
+}
 
-        axes.set_ylabel(name)
-        axes.plot(data)
 
-    fig.tight_layout()
+def load_view(name: str):
+    """
+    Import a registered view.
 
-    plt.show()
+    :param name: The name of the view
+    :returns: The view function
+    """
+    spec = VIEWS[name]
+    return getattr(importlib.import_module(spec.module), spec.function)
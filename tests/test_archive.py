@@ -0,0 +1,100 @@
+"""Tests for compressed inflammation data archives."""
+
+import os
+
+import numpy as np
+import numpy.testing as npt
+import pytest
+
+DATA_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'inflammation-01.csv')
+
+
+@pytest.fixture
+def data():
+    """Random inflammation data"""
+    return np.random.default_rng(3).integers(0, 20, size=(103, 40)).astype(np.float64)
+
+
+@pytest.mark.parametrize("codec", ['zlib', 'lzma'])
+@pytest.mark.parametrize("dtype", [np.float64, np.uint8])
+def test_write_read_archive(tmp_path, data, codec, dtype):
+    """Test data is read back unchanged from an archive"""
+    from inflammation.archive import Archive, read_archive, write_archive
+    filename = str(tmp_path / 'data.inflz')
+    write_archive(filename, data.astype(dtype), chunk_rows=10, codec=codec)
+
+    archive = Archive(filename)
+    assert archive.shape == data.shape
+    assert archive.dtype == dtype
+    assert archive.codec == codec
+    assert len(archive.index) == 11
+    npt.assert_array_equal(read_archive(filename), data)
+
+
+@pytest.mark.parametrize(
+    "start, stop",
+    [(0, 10), (5, 25), (20, 21), (95, None), (50, 50), (-3, None)])
+def test_read_range(tmp_path, data, start, stop):
+    """Test reading a range of rows, serially and in parallel"""
+    from inflammation.archive import Archive, write_archive
+    filename = str(tmp_path / 'data.inflz')
+    write_archive(filename, data, chunk_rows=10)
+
+    archive = Archive(filename)
+    npt.assert_array_equal(archive.read(start, stop), data[start:stop])
+    npt.assert_array_equal(archive.read(start, stop, n_workers=1), data[start:stop])
+
+
+def test_iter_chunks(tmp_path, data):
+    """Test reading an archive one chunk at a time"""
+    from inflammation.archive import Archive, write_archive
+    filename = str(tmp_path / 'data.inflz')
+    write_archive(filename, data, chunk_rows=25)
+
+    chunks = list(Archive(filename).iter_chunks())
+    assert [len(chunk) for chunk in chunks] == [25, 25, 25, 25, 3]
+    npt.assert_array_equal(np.concatenate(chunks), data)
+
+
+def test_csv_to_archive(tmp_path):
+    """Test load_csv reads an archive converted from a CSV, as float64 unless compact"""
+    from inflammation import models
+    from inflammation.archive import csv_to_archive
+    filename = csv_to_archive(DATA_FILE, str(tmp_path / 'inflammation-01.inflz'), compact=True)
+
+    data = models.load_csv(filename)
+    assert data.dtype == np.float64
+    npt.assert_array_equal(data, models.load_csv(DATA_FILE))
+
+    compact = models.load_csv(filename, compact=True)
+    assert compact.dtype == np.uint8
+    npt.assert_array_equal(compact, data)
+
+
+@pytest.mark.parametrize("compact", [False, True])
+@pytest.mark.parametrize(
+    "text, shape",
+    [
+        ('0,1,2\n', (1, 3)),
+        ('1\n2\n3\n', (3, 1)),
+    ])
+def test_csv_to_archive_single_row_or_column(tmp_path, text, shape, compact):
+    """Test a single patient or a single day keeps its axes through an archive"""
+    from inflammation import models
+    from inflammation.archive import Archive, csv_to_archive
+    csv_filename = tmp_path / 'patients.csv'
+    csv_filename.write_text(text)
+    filename = csv_to_archive(str(csv_filename), compact=compact)
+
+    assert Archive(filename).shape == shape
+    data = models.load_csv(filename, compact=compact)
+    expected = models.load_csv(str(csv_filename), compact=compact)
+    assert data.shape == expected.shape
+    npt.assert_array_equal(data, expected)
+
+
+def test_not_an_archive(tmp_path):
+    """Test other files are rejected"""
+    from inflammation.archive import Archive
+    with pytest.raises(ValueError):
+        Archive(DATA_FILE)
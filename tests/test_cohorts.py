@@ -0,0 +1,101 @@
+"""Tests for per-doctor cohort aggregation."""
+
+import numpy as np
+import numpy.testing as npt
+import pytest
+
+from inflammation.models import Doctor, Observation, Patient, patient_from_row
+
+
+@pytest.fixture
+def doctors():
+    """Doctors with patients observed on differing days"""
+    return [
+        Doctor('John', [
+            patient_from_row('Alice', [1, 2, 3]),
+            Patient('Bob', [Observation(5, 0), Observation(0, 2)]),
+        ]),
+        Doctor('Jane'),
+        Doctor('Sarah', [patient_from_row('Carl', [4, 4])]),
+    ]
+
+
+def test_pack_patients():
+    """Test packing patients into an array, with NaN for missing days"""
+    from inflammation.cohorts import pack_patients
+    patients = [patient_from_row('Alice', [1, 2]), Patient('Bob', [Observation(3, 2)])]
+    npt.assert_array_equal(pack_patients(patients), [[1, 2, np.nan], [np.nan, np.nan, 3]])
+
+
+@pytest.mark.parametrize(
+    "observations",
+    [
+        [Observation(1, 0), Observation(2, -1)],
+        [Observation(1, 0), Observation(2, 0)],
+    ])
+def test_pack_patients_errors(observations):
+    """Test negative and repeated observation days are rejected"""
+    from inflammation.cohorts import pack_patients
+    with pytest.raises(ValueError):
+        pack_patients([patient_from_row('Alice', [1, 2]), Patient('Bob', observations)])
+
+
+def test_segment_reductions():
+    """Test reducing segments of rows matches reducing each segment separately"""
+    from inflammation.cohorts import segment_reductions
+    from inflammation.models import daily_max, daily_mean, daily_min
+    data = np.random.default_rng(2).integers(0, 20, size=(30, 5)).astype(np.float64)
+    starts = np.array([0, 4, 5, 21])
+    total, count, maximum, minimum = segment_reductions(data, starts)
+
+    for i, segment in enumerate(np.split(data, starts[1:])):
+        npt.assert_allclose(total[i] / count[i], daily_mean(segment))
+        npt.assert_array_equal(maximum[i], daily_max(segment))
+        npt.assert_array_equal(minimum[i], daily_min(segment))
+
+
+def test_cohort_statistics(doctors):
+    """Test per-doctor daily statistics, keyed by doctor name"""
+    from inflammation.cohorts import CohortStatistics
+    statistics = CohortStatistics(doctors)
+
+    mean = statistics.daily_mean()
+    assert list(mean) == ['John', 'Jane', 'Sarah']
+    npt.assert_array_equal(mean['John'], [3, 2, 1.5])
+    npt.assert_array_equal(mean['Jane'], [np.nan] * 3)
+    npt.assert_array_equal(mean['Sarah'], [4, 4, np.nan])
+    npt.assert_array_equal(statistics.daily_max()['John'], [5, 2, 3])
+    npt.assert_array_equal(statistics.daily_min()['John'], [1, 2, 0])
+    npt.assert_array_equal(statistics.daily_count()['John'], [2, 1, 2])
+
+
+def test_cohort_statistics_add_patient(doctors):
+    """Test adding patients updates the statistics like rebuilding them"""
+    from inflammation.cohorts import CohortStatistics
+    statistics = CohortStatistics(doctors)
+
+    statistics.add_patient(doctors[1], patient_from_row('Dan', [1, 2, 3, 4]))
+    statistics.add_patient(doctors[2], patient_from_row('Eve', [6]))
+    statistics.add_patient(doctors[2], patient_from_row('Eve', [9]))
+    assert [patient.name for patient in doctors[2].patients] == ['Carl', 'Eve']
+
+    rebuilt = CohortStatistics(doctors)
+    for name in ['John', 'Jane', 'Sarah']:
+        npt.assert_array_equal(statistics.daily_mean()[name], rebuilt.daily_mean()[name])
+        npt.assert_array_equal(statistics.daily_max()[name], rebuilt.daily_max()[name])
+        npt.assert_array_equal(statistics.daily_min()[name], rebuilt.daily_min()[name])
+        npt.assert_array_equal(statistics.daily_count()[name], rebuilt.daily_count()[name])
+
+
+def test_cohort_statistics_errors(doctors):
+    """Test duplicate and unknown doctors are rejected"""
+    from inflammation.cohorts import CohortStatistics
+    with pytest.raises(ValueError):
+        CohortStatistics(doctors + [Doctor('John')])
+
+    with pytest.raises(KeyError):
+        CohortStatistics(doctors).add_patient(Doctor('Tom'), Patient('Alice'))
+
+    with pytest.raises(ValueError):
+        CohortStatistics(doctors).add_patient(doctors[1], Patient('Dan', [Observation(1, -1)]))
+    assert doctors[1].patients is None
@@ -0,0 +1,86 @@
+"""
+Import time checks guarding the startup latency of the text views.
+
+These run Python with -X importtime and check which modules get imported,
+rather than timing them, so they do not depend on the speed of the machine.
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+pytestmark = pytest.mark.skipif(
+    sys.version_info < (3, 7), reason="-X importtime requires Python 3.7+")
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+
+
+def _import_times(*args):
+    """
+    Run Python with -X importtime and collect the cumulative import time per module
+
+    :param args: Arguments to pass to Python
+    :returns: dict of module name -> cumulative import time in microseconds
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', *args],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+        universal_newlines=True, check=True)
+
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+@pytest.mark.parametrize("view", ['record', 'json'])
+def test_text_views_skip_heavy_imports(view):
+    """
+    Test text views on a CSV do not import plotting, server or archive dependencies.
+
+    lzma is not checked here, as argparse imports it through shutil.
+    """
+    times = _import_times('inflammation-analysis.py', '--view', view, 'data/small-01.csv')
+    assert 'inflammation.views' in times
+    assert 'matplotlib' not in times
+    assert 'http.server' not in times
+    assert 'inflammation.archive' not in times
+
+
+def test_load_csv_skips_archive_imports():
+    """Test loading a CSV does not import the archive module or its codecs."""
+    script = ('from inflammation import models, views; '
+              'data = models.load_csv("data/small-01.csv"); '
+              'views.display_patient_record(models.patient_from_row("A", data[0]))')
+    times = _import_times('-c', script)
+    assert 'inflammation.models' in times
+    assert 'inflammation.archive' not in times
+    assert 'lzma' not in times
+
+
+def test_views_skip_heavy_imports():
+    """Test importing the views does not import plotting or server dependencies."""
+    times = _import_times('-c', 'import inflammation.views')
+    assert 'inflammation.views' in times
+    assert 'inflammation.plots' not in times
+    assert 'matplotlib' not in times
+    assert 'http.server' not in times
+
+
+def test_load_view():
+    """Test registered views can be loaded by name."""
+    from inflammation import views
+    assert views.load_view('record') is views.display_patient_record
+    assert views.load_view('json') is views.display_patient_as_json
+
+    from inflammation import plots
+    assert views.load_view('visualize') is plots.visualize
+    assert callable(views.visualize)
+
+    with pytest.raises(KeyError):
+        views.load_view('unknown')
@@ -95,3 +95,105 @@ def test_load_txt():
                "c8713a17cd7303a0e83d598a4c69cdf78fdb7624/data/inflammation-01.csv"
     inflammation_data = models.load_csv(filename)
     assert (len(inflammation_data) > 0)
+
+
+@pytest.mark.parametrize(
+    "test, expected",
+    [
+        ([[0, 1], [2, 3]], np.uint8),
+        ([[0, 255], [2, 3]], np.uint8),
+        ([[0, 256], [2, 3]], np.uint16),
+        ([[0, 70000], [2, 3]], np.float32),
+        ([[0, 1.5], [2, 3]], np.float32),
+        ([[0, -1], [2, 3]], np.float32),
+        ([[0, np.nan], [2, 3]], np.float32),
+        ([[0, np.inf], [2, 3]], np.float32),
+        ([[0, 1], [2, 3]] * 3, np.uint8),
+        ([[0, 1], [2, 3], [2, 300], [0.5, 1]], np.float32),
+    ])
+def test_compact_dtype(test, expected, monkeypatch):
+    """Test the narrowest dtype is chosen, whole and one block of rows at a time."""
+    from inflammation import models
+    assert models.compact_dtype(np.array(test, dtype=float)) == expected
+
+    monkeypatch.setattr(models, '_COMPACT_BLOCK_ROWS', 2)
+    assert models.compact_dtype(np.array(test, dtype=float)) == expected
+
+
+def test_load_csv_compact():
+    """Test compact loading matches the default float64 results within tolerance."""
+    import os
+    from inflammation import models
+
+    filename = os.path.join(os.path.dirname(__file__), '..', 'data', 'inflammation-01.csv')
+    data = models.load_csv(filename)
+    compact = models.load_csv(filename, compact=True)
+
+    assert data.dtype == np.float64
+    assert compact.dtype == np.uint8
+    npt.assert_array_equal(compact, data)
+    npt.assert_array_equal(models.daily_mean(compact), models.daily_mean(data))
+    npt.assert_array_equal(models.daily_max(compact), models.daily_max(data))
+    npt.assert_array_equal(models.daily_min(compact), models.daily_min(data))
+
+    normalised = models.patient_normalise(compact)
+    assert normalised.dtype == np.float32
+    npt.assert_allclose(normalised, models.patient_normalise(data), rtol=models.COMPACT_RTOL)
+
+
+def test_daily_mean_float32_accumulates_in_float64():
+    """Test the mean of float32 data is accumulated in float64."""
+    from inflammation.models import daily_mean
+    data = np.full((10 ** 5, 1), 0.1, dtype=np.float32)
+    result = daily_mean(data)
+    assert result.dtype == np.float64
+    npt.assert_allclose(result, [np.float64(np.float32(0.1))], rtol=1e-12)
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("0,1,2\n3,4,5\n6,7,8\n", np.uint8),
+        ("0,1,2\n3,400,5\n6,7,8\n", np.uint16),
+        ("0,1,2\n3,4,5\n6,7.5,8\n", np.float32),
+        ("0,1,2\n", np.uint8),
+    ])
+def test_load_csv_compact_blocks(tmp_path, monkeypatch, text, expected):
+    """Test compact loading in blocks of rows gives the same data as loading in one go."""
+    from inflammation import models
+    monkeypatch.setattr(models, '_COMPACT_BLOCK_ROWS', 2)
+    filename = tmp_path / 'data.csv'
+    filename.write_text(text)
+
+    compact = models.load_csv(str(filename), compact=True)
+    data = models.load_csv(str(filename))
+    assert compact.dtype == expected
+    assert compact.shape == data.shape
+    npt.assert_allclose(compact, data, rtol=models.COMPACT_RTOL)
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_load_csv_file_objects(tmp_path, compact):
+    """Test loading from an open file, a StringIO and a list of lines, as np.loadtxt does."""
+    import io
+    from inflammation import models
+    filename = tmp_path / 'data.csv'
+    filename.write_text("1,2\n3,4\n")
+    expected = np.array([[1, 2], [3, 4]])
+
+    with open(filename, encoding='utf-8') as csvfile:
+        npt.assert_array_equal(models.load_csv(csvfile, compact=compact), expected)
+    npt.assert_array_equal(models.load_csv(io.StringIO("1,2\n3,4\n"), compact=compact), expected)
+    npt.assert_array_equal(models.load_csv(["1,2", "3,4"], compact=compact), expected)
+    npt.assert_array_equal(models.load_csv(filename, compact=compact), expected)
+    npt.assert_array_equal(models.load_csv(str(filename).encode(), compact=compact), expected)
+
+
+def test_is_archive():
+    """Test archives are recognised by the suffix of their path."""
+    import io
+    from inflammation.models import is_archive
+    assert is_archive('data/inflammation-01.inflz')
+    assert is_archive(b'data/inflammation-01.inflz')
+    assert not is_archive('data/inflammation-01.csv')
+    assert not is_archive(io.StringIO('1,2\n'))
@@ -0,0 +1,62 @@
+"""Tests for the shared memory worker pool."""
+
+import sys
+
+import numpy as np
+import numpy.testing as npt
+import pytest
+
+pytestmark = pytest.mark.skipif(
+    sys.version_info < (3, 8), reason="multiprocessing.shared_memory requires Python 3.8+")
+
+
+def _row_sums(data):
+    """Module level row function so it can be sent to worker processes."""
+    return data.sum(axis=1)
+
+
+def test_row_ranges():
+    """Test splitting rows into contiguous ranges."""
+    from inflammation.parallel import row_ranges
+    assert row_ranges(5, 2) == [(0, 2), (2, 4), (4, 5)]
+    assert row_ranges(4, 4) == [(0, 4)]
+
+    with pytest.raises(ValueError):
+        row_ranges(4, 0)
+
+
+def test_map_rows():
+    """Test a row function gives the same result in parallel."""
+    from inflammation.parallel import map_rows
+    data = np.arange(60, dtype=np.float64).reshape(20, 3)
+    result = map_rows(_row_sums, data, n_workers=2, chunk_size=3)
+    npt.assert_array_equal(result, _row_sums(data))
+
+    # The result is the shared output block itself, not a copy of it
+    assert not result.flags.owndata
+    view = result[5:]
+    del result
+    npt.assert_array_equal(view, _row_sums(data)[5:])
+
+
+def test_parallel_patient_normalise():
+    """Test parallel normalisation matches serial normalisation."""
+    from inflammation.models import patient_normalise
+    from inflammation.parallel import parallel_patient_normalise
+    data = np.random.default_rng(0).integers(0, 20, size=(50, 40)).astype(np.uint8)
+    result = parallel_patient_normalise(data, n_workers=2)
+    assert result.dtype == np.float32
+    npt.assert_array_equal(result, patient_normalise(data))
+
+
+def test_parallel_patient_normalise_errors():
+    """Test errors in worker processes are raised to the caller."""
+    from inflammation.parallel import parallel_patient_normalise
+    data = np.ones((10, 3))
+    data[7, 1] = -1
+
+    with pytest.raises(ValueError):
+        parallel_patient_normalise(data, n_workers=2, chunk_size=2)
+
+    with pytest.raises(ValueError):
+        parallel_patient_normalise(np.ones(3), n_workers=2)
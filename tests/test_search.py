@@ -0,0 +1,140 @@
+"""Tests for the patient similarity search index."""
+
+import numpy as np
+import numpy.testing as npt
+import pytest
+
+
+def _brute_force(data, queries, k):
+    """Find the k closest rows to each query by comparing against every row"""
+    distances = np.sqrt(((queries[:, np.newaxis, :] - data[np.newaxis, :, :]) ** 2).sum(axis=2))
+    indices = np.argsort(distances, axis=1, kind='stable')[:, :k]
+    return indices, np.take_along_axis(distances, indices, axis=1)
+
+
+@pytest.fixture
+def data():
+    """Random inflammation data"""
+    return np.random.default_rng(1).integers(0, 20, size=(200, 40)).astype(np.float64)
+
+
+@pytest.mark.parametrize("block_size", [1, 7, 4096])
+def test_query_matches_brute_force(data, block_size):
+    """Test blocked search gives the same results as comparing against every row"""
+    from inflammation.search import PatientIndex
+    queries = data[[3, 50, 199]] + 0.5
+    indices, distances = PatientIndex(data, block_size=block_size).query(queries, k=5)
+    expected_indices, expected_distances = _brute_force(data, queries, 5)
+
+    npt.assert_array_equal(indices, expected_indices)
+    npt.assert_allclose(distances, expected_distances)
+
+
+def test_query_compact_uint16():
+    """Test compact uint16 data with large, close readings is ranked exactly"""
+    from inflammation.search import PatientIndex
+    rng = np.random.default_rng(4)
+    data = rng.integers(20000, 60000, size=(500, 40)).astype(np.uint16)
+    queries = data[:50].astype(np.float64) + rng.choice([-0.5, 0.5], size=(50, 40)) / 40
+    indices, distances = PatientIndex(data, block_size=64).query(queries, k=3)
+    expected_indices, expected_distances = _brute_force(data.astype(np.float64), queries, 3)
+
+    npt.assert_array_equal(indices, expected_indices)
+    npt.assert_allclose(distances, expected_distances, rtol=1e-6)
+
+
+@pytest.mark.parametrize("block_size", [1, 7, 4096])
+def test_query_batch_blocks(data, block_size):
+    """Test a batch of more queries than the block size gives the brute force results"""
+    from inflammation.search import PatientIndex
+    queries = data[::3] + np.random.default_rng(5).random((len(data[::3]), data.shape[1]))
+    indices, distances = PatientIndex(data, block_size=block_size).query(queries, k=4)
+    expected_indices, expected_distances = _brute_force(data, queries, 4)
+
+    npt.assert_array_equal(indices, expected_indices)
+    npt.assert_allclose(distances, expected_distances)
+
+
+def test_query_single(data):
+    """Test a single series finds itself first"""
+    from inflammation.search import PatientIndex
+    indices, distances = PatientIndex(data, block_size=16).query(data[42], k=3)
+    assert indices.shape == (3,)
+    assert indices[0] == 42
+    assert distances[0] == pytest.approx(0, abs=1e-6)
+
+
+def test_query_normalised(data):
+    """Test searching normalised series finds a scaled copy of a patient"""
+    from inflammation.search import PatientIndex
+    indices, _ = PatientIndex(data, normalise=True).query(data[10] * 3, k=1)
+    assert indices[0] == 10
+
+
+def test_query_prefilter(data):
+    """Test the principal component prefilter finds exact matches and exact distances"""
+    from inflammation.search import PatientIndex
+    index = PatientIndex(data, block_size=32, n_components=8)
+    indices, distances = index.query(data[[0, 1]], k=4, candidates=len(data))
+    expected_indices, expected_distances = _brute_force(data, data[[0, 1]], 4)
+
+    npt.assert_array_equal(indices, expected_indices)
+    npt.assert_allclose(distances, expected_distances)
+    assert index.query(data[5], k=1)[0][0] == 5
+
+
+@pytest.mark.parametrize("block_size", [1, 30, 4096])
+def test_query_prefilter_batch(data, block_size):
+    """Test re-ranking a batch of queries in blocks matches re-ranking them one at a time"""
+    from inflammation.search import PatientIndex
+    index = PatientIndex(data, block_size=block_size, n_components=5)
+    queries = data[:17] + 0.25
+    indices, distances = index.query(queries, k=3, candidates=12)
+
+    for i, query in enumerate(queries):
+        single_indices, single_distances = index.query(query, k=3, candidates=12)
+        npt.assert_array_equal(indices[i], single_indices)
+        npt.assert_allclose(distances[i], single_distances)
+
+
+def test_query_errors(data):
+    """Test invalid indexes and queries are rejected"""
+    from inflammation.search import PatientIndex
+    with pytest.raises(ValueError):
+        PatientIndex(data[0])
+
+    with pytest.raises(ValueError):
+        PatientIndex(data, block_size=0)
+
+    with pytest.raises(ValueError):
+        PatientIndex(data, n_components=0)
+
+    with pytest.raises(ValueError):
+        PatientIndex(data, n_components=data.shape[1] + 1)
+
+    with pytest.raises(ValueError):
+        PatientIndex(data).query(data[0, :10])
+
+    with pytest.raises(ValueError):
+        PatientIndex(data).query(data[0], k=0)
+
+
+def test_search_records():
+    """Test hits are mapped back to Patient and Doctor records"""
+    from inflammation.models import Doctor, Patient, patient_from_row
+    from inflammation.search import PatientIndex
+    data = np.array([[0, 1, 2], [4, 5, 6], [9, 9, 9]], dtype=np.float64)
+    alice = patient_from_row('Alice', data[0])
+    doctor = Doctor('John', [alice])
+    index = PatientIndex(data, names=['Alice', 'Bob', 'Sarah'], doctors=[doctor])
+
+    hits = index.search(np.array([[0, 1, 3], [9, 9, 8]]), k=2)
+    assert [[hit.index for hit in query_hits] for query_hits in hits] == [[0, 1], [2, 1]]
+    assert hits[0][0].patient is alice
+    assert hits[0][0].doctor is doctor
+    assert hits[0][0].distance == pytest.approx(1)
+    assert hits[1][0].patient == Patient('Sarah', patient_from_row('Sarah', data[2]).observations)
+    assert hits[1][0].doctor is None
+
+    single = index.search(data[1], k=1)
+    assert single[0].patient.name == 'Bob'
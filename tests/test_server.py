@@ -0,0 +1,145 @@
+"""Tests for the query server."""
+
+import json
+import os
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+
+@pytest.fixture
+def data_file(tmp_path):
+    """A small inflammation data file"""
+    path = tmp_path / 'data.csv'
+    path.write_text("0,1,2\n4,5,6\n")
+    return str(path)
+
+
+@pytest.fixture
+def server_url(data_file):
+    """A running query server for the data file"""
+    from inflammation.server import DataStore, QueryServer
+    server = QueryServer(('127.0.0.1', 0), DataStore([data_file]), max_workers=4)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def _get(url):
+    with urllib.request.urlopen(url) as response:
+        return response.read().decode('utf-8')
+
+
+def _touch(filename):
+    """Move a file's modification time forward so it is seen as changed"""
+    stat = os.stat(filename)
+    os.utime(filename, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+
+def test_data_store_reloads(data_file):
+    """Test data is cached and reloaded when the file changes"""
+    from inflammation.server import DataStore
+    store = DataStore([data_file])
+    data = store.get(data_file)
+    assert store.get(data_file) is data
+
+    with open(data_file, 'w', encoding='utf-8') as csvfile:
+        csvfile.write("7,8,9\n")
+    _touch(data_file)
+
+    assert store.get(data_file).tolist() == [7, 8, 9]
+
+
+def test_data_store_keeps_data_when_file_is_unreadable(data_file):
+    """Test the last data loaded is kept when a file is half-written or removed"""
+    from inflammation.server import DataStore
+    store = DataStore([data_file])
+    data = store.get(data_file)
+
+    with open(data_file, 'w', encoding='utf-8') as csvfile:
+        csvfile.write("7,8,9\n1,2")
+    _touch(data_file)
+    assert store.get(data_file) is data
+
+    os.remove(data_file)
+    assert store.get(data_file) is data
+
+    with open(data_file, 'w', encoding='utf-8') as csvfile:
+        csvfile.write("7,8,9\n")
+    assert store.get(data_file).tolist() == [7, 8, 9]
+
+
+def test_data_store_does_not_wait_for_reload(data_file):
+    """Test queries get the cached data while another thread reloads a file"""
+    from inflammation.server import DataStore
+    store = DataStore([data_file])
+    data = store.get(data_file)
+    _touch(data_file)
+
+    with store._locks[data_file]:  # pylint: disable=protected-access
+        assert store.get(data_file) is data
+    assert store.get(data_file) is not data
+
+
+def test_data_store_resolve(data_file):
+    """Test only served files can be queried"""
+    from inflammation.server import DataStore
+    store = DataStore([data_file])
+    assert store.resolve() == data_file
+    assert store.resolve(data_file) == data_file
+
+    with pytest.raises(KeyError):
+        store.resolve('data/inflammation-01.csv')
+
+
+def test_record_query(server_url):
+    """Test a patient record can be queried"""
+    assert _get(server_url + '/record?patient=1') == "UNKNOWN\n0 4.0\n1 5.0\n2 6.0"
+
+
+def test_json_query(server_url):
+    """Test a patient record can be queried as json"""
+    output = json.loads(_get(server_url + '/json?patient=0'))
+    assert output[0]['observations'][2] == {'day': 2, 'value': 2.0}
+
+
+def test_statistics_query(server_url):
+    """Test daily statistics can be queried"""
+    output = json.loads(_get(server_url + '/statistics'))
+    assert output == {'average': [2.0, 3.0, 4.0], 'max': [4.0, 5.0, 6.0], 'min': [0.0, 1.0, 2.0]}
+
+
+def test_query_after_file_removed(server_url, data_file):
+    """Test queries are answered from memory after a served file is removed"""
+    os.remove(data_file)
+    assert _get(server_url + '/record?patient=1') == "UNKNOWN\n0 4.0\n1 5.0\n2 6.0"
+
+
+def test_statistics_query_missing_readings(tmp_path):
+    """Test days without readings are written as null in statistics"""
+    from inflammation.server import DataStore, query_statistics
+    path = tmp_path / 'missing.csv'
+    path.write_text("0,nan,2\n4,nan,6\n")
+    _, body = query_statistics(DataStore([str(path)]), {})
+    assert json.loads(body) == {'average': [2.0, None, 4.0], 'max': [4.0, None, 6.0],
+                                'min': [0.0, None, 2.0]}
+
+
+@pytest.mark.parametrize(
+    "query, status",
+    [
+        ('/unknown', 404),
+        ('/record?file=other.csv', 404),
+        ('/record?patient=2', 400),
+        ('/record?patient=Alice', 400),
+    ])
+def test_query_errors(server_url, query, status):
+    """Test invalid queries are rejected"""
+    with pytest.raises(urllib.error.HTTPError) as error:
+        _get(server_url + query)
+    assert error.value.code == status